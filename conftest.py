@@ -0,0 +1 @@
+"""Pytest configuration; its presence puts the repository root on sys.path."""
@@ -0,0 +1,208 @@
+"""Tests for the persistent memory-mapped embedding cache."""
+
+import multiprocessing
+import sqlite3
+from typing import Any, List, Tuple
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from typesense_vector_store_action.modules.embedding_cache import (  # noqa: E402
+    CachedEmbeddings,
+    EmbeddingCache,
+    content_hash,
+    model_identity,
+)
+
+DIMS = 4
+MODEL = "test-model"
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that count the texts sent to the model."""
+
+    def __init__(
+        self, dimensions: int = DIMS, base_url: str = "http://a", api_key: str = "k"
+    ) -> None:
+        """Configure the fake model."""
+        self.model = "fake"
+        self.dimensions = dimensions
+        self.base_url = base_url
+        self.api_key = api_key
+        # private, so the counter is not part of the model identity
+        self._calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed each text as its length repeated."""
+        self._calls += len(texts)
+        return [[float(len(text))] * self.dimensions for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self.embed_documents([text])[0]
+
+    @property
+    def calls(self) -> int:
+        """Number of texts embedded so far."""
+        return self._calls
+
+
+def _vector(value: float) -> List[float]:
+    return [value] * DIMS
+
+
+def _store(cache: EmbeddingCache, *values: float) -> List[str]:
+    hashes = [content_hash(str(value)) for value in values]
+    cache.put_many(MODEL, hashes, [_vector(value) for value in values])
+    return hashes
+
+
+def _slots(cache: EmbeddingCache) -> List[Tuple[str, int]]:
+    return (
+        cache._connection()
+        .execute("SELECT hash, slot FROM entries ORDER BY slot")
+        .fetchall()
+    )
+
+
+@pytest.fixture
+def cache(tmp_path: Any) -> EmbeddingCache:
+    """A cache with room for three vectors per space."""
+    return EmbeddingCache(str(tmp_path), max_bytes=3 * DIMS * 4)
+
+
+def test_round_trip(cache: EmbeddingCache) -> None:
+    """Stored vectors come back; unknown hashes are misses."""
+    hashes = _store(cache, 1.0, 2.0)
+    assert cache.get_many(MODEL, [*hashes, "unknown"]) == [
+        _vector(1.0),
+        _vector(2.0),
+        None,
+    ]
+    assert cache.get_many("other-model", hashes) == [None, None]
+
+
+def test_lru_eviction_reuses_slots(cache: EmbeddingCache) -> None:
+    """The least recently used entry is evicted and its slot reused."""
+    first, second, third = _store(cache, 1.0, 2.0, 3.0)
+    cache._connection().execute(
+        "UPDATE entries SET last_used = 0 WHERE hash = ?", (second,)
+    )
+    cache._connection().commit()
+    old_slot = dict(_slots(cache))[second]
+
+    (fourth,) = _store(cache, 4.0)
+
+    assert cache.get_many(MODEL, [second]) == [None]
+    assert cache.get_many(MODEL, [first, third, fourth]) == [
+        _vector(1.0),
+        _vector(3.0),
+        _vector(4.0),
+    ]
+    assert dict(_slots(cache))[fourth] == old_slot
+    assert cache.stats()["entries"] == 3
+
+
+def test_reads_refresh_recency(cache: EmbeddingCache) -> None:
+    """A read keeps an old entry from being evicted next."""
+    first, second, _ = _store(cache, 1.0, 2.0, 3.0)
+    with cache._connection() as connection:
+        connection.execute(
+            "UPDATE entries SET last_used = 0 WHERE hash IN (?, ?)", (first, second)
+        )
+        connection.execute("UPDATE entries SET last_used = 1 WHERE hash = ?", (first,))
+    cache.get_many(MODEL, [first])
+    _store(cache, 4.0)
+    assert cache.get_many(MODEL, [first, second]) == [_vector(1.0), None]
+
+
+def test_reused_slot_is_a_checksum_miss(cache: EmbeddingCache) -> None:
+    """An index row pointing at a slot rewritten since is not served."""
+    first, second = _store(cache, 1.0, 2.0)
+    slots = dict(_slots(cache))
+    # point the first entry at the second entry's slot, as if it had been reused
+    with cache._connection() as connection:
+        connection.execute(
+            "UPDATE entries SET slot = ? WHERE hash = ?", (slots[second], first)
+        )
+    assert cache.get_many(MODEL, [first, second]) == [None, _vector(2.0)]
+
+
+def test_vector_sizes_do_not_mix(cache: EmbeddingCache) -> None:
+    """A different vector size gets its own space and never resets the other."""
+    (small,) = _store(cache, 1.0)
+    cache.put_many(MODEL, [small], [[9.0] * (DIMS * 2)])
+    assert cache.get_many(MODEL, [small], dims=DIMS) == [_vector(1.0)]
+    assert cache.get_many(MODEL, [small], dims=DIMS * 2) == [[9.0] * (DIMS * 2)]
+    assert cache.get_many(MODEL, [small], dims=DIMS * 3) == [None]
+    # with two sizes stored and none requested, nothing is guessed
+    assert cache.get_many(MODEL, [small]) == [None]
+
+
+def test_model_identity_covers_configuration() -> None:
+    """Settings that change vectors change the key; credentials do not."""
+    base = model_identity(CountingEmbeddings())
+    assert model_identity(CountingEmbeddings(api_key="rotated")) == base
+    assert model_identity(CountingEmbeddings(dimensions=DIMS * 2)) != base
+    assert model_identity(CountingEmbeddings(base_url="http://b")) != base
+
+
+def test_cached_embeddings_skip_the_model(tmp_path: Any) -> None:
+    """Repeated and duplicate texts are embedded once, across wrappers."""
+    cache = EmbeddingCache(str(tmp_path))
+    model = CountingEmbeddings()
+    vectors = CachedEmbeddings(model, cache).embed_documents(["a", "bb", "a"])
+    assert vectors == [_vector(1.0), _vector(2.0), _vector(1.0)]
+    assert model.calls == 2
+    assert CachedEmbeddings(model, cache).embed_documents(["bb", "ccc"]) == [
+        _vector(2.0),
+        _vector(3.0),
+    ]
+    assert model.calls == 3
+
+    other = CountingEmbeddings(dimensions=DIMS * 2)
+    assert CachedEmbeddings(other, cache).embed_documents(["a"]) == [[1.0] * (DIMS * 2)]
+    assert other.calls == 1
+
+
+def test_unreadable_index_falls_back_to_the_model(tmp_path: Any) -> None:
+    """Cache failures never fail the embedding call."""
+    cache = EmbeddingCache(str(tmp_path))
+    model = CountingEmbeddings()
+    wrapped = CachedEmbeddings(model, cache)
+    cache._connection().close()
+    cache._local.connection = sqlite3.connect(":memory:")
+    assert wrapped.embed_documents(["a"]) == [_vector(1.0)]
+    assert model.calls == 1
+
+
+def _write_from_process(args: Tuple[str, int]) -> int:
+    directory, worker = args
+    cache = EmbeddingCache(directory, max_bytes=40 * DIMS * 4)
+    wrong = 0
+    for round_ in range(20):
+        values = [float((worker * 7 + round_ + i) % 100) for i in range(8)]
+        hashes = [content_hash(str(value)) for value in values]
+        cached = cache.get_many(MODEL, hashes)
+        wrong += sum(
+            vector is not None and vector != _vector(value)
+            for vector, value in zip(cached, values)
+        )
+        cache.put_many(MODEL, hashes, [_vector(value) for value in values])
+    return wrong
+
+
+def test_processes_share_a_cache_under_eviction(tmp_path: Any) -> None:
+    """Concurrent writers evicting each other never serve a wrong vector."""
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        wrong = pool.map(
+            _write_from_process, [(str(tmp_path), worker) for worker in range(4)]
+        )
+    assert wrong == [0, 0, 0, 0]
+    assert (
+        EmbeddingCache(str(tmp_path), max_bytes=40 * DIMS * 4).stats()["entries"] <= 40
+    )
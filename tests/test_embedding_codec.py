@@ -0,0 +1,92 @@
+"""Tests for compact embedding encodings of knode exports."""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from typesense_vector_store_action.modules.embedding_codec import (  # noqa: E402
+    BASE64_FORMAT,
+    BLOCK_FORMAT,
+    decode_knodes,
+    encode_knodes,
+)
+
+DIMS = 64
+
+
+@pytest.fixture
+def knodes() -> list:
+    """Knodes with random unit-scale vectors."""
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(20, DIMS)).astype(np.float32)
+    return [
+        {
+            "id": str(i),
+            "text": f"text {i}",
+            "metadata": {"page": i},
+            "vec": vector.tolist(),
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+@pytest.mark.parametrize("embedding_format", [BLOCK_FORMAT, BASE64_FORMAT])
+@pytest.mark.parametrize(
+    "dtype, tolerance",
+    [("float32", 0.0), ("float16", 1e-2), ("int8", None)],
+)
+def test_round_trip_error_is_bounded(
+    knodes: list, embedding_format: str, dtype: str, tolerance: float
+) -> None:
+    """Decoded vectors match the originals within the precision of the dtype."""
+    envelope = json.loads(json.dumps(encode_knodes(knodes, embedding_format, dtype)))
+    records, vectors = decode_knodes(envelope)
+
+    original = np.asarray([knode["vec"] for knode in knodes], dtype=np.float32)
+    error = np.abs(vectors - original)
+    if tolerance is None:
+        # symmetric int8 rounding is off by at most half a step per component
+        steps = np.abs(original).max(axis=1, keepdims=True) / 127.0
+        assert (error <= steps / 2 + 1e-6).all()
+    else:
+        assert error.max() <= tolerance
+    assert records == [
+        {key: value for key, value in knode.items() if key != "vec"} for knode in knodes
+    ]
+
+
+def test_block_format_omits_per_knode_vectors(knodes: list) -> None:
+    """The block format writes all vectors once, outside the records."""
+    envelope = encode_knodes(knodes, BLOCK_FORMAT, "int8")
+    assert all("vec" not in record for record in envelope["knodes"])
+    assert envelope["embedding_encoding"] == {
+        "format": BLOCK_FORMAT,
+        "dtype": "int8",
+        "dims": DIMS,
+    }
+    assert len(envelope["scales"]) == len(knodes)
+
+
+def test_zero_vectors_survive_int8(knodes: list) -> None:
+    """A zero vector does not divide by a zero scale."""
+    knodes[0]["vec"] = [0.0] * DIMS
+    _, vectors = decode_knodes(encode_knodes(knodes, BLOCK_FORMAT, "int8"))
+    assert vectors is not None
+    assert not vectors[0].any()
+
+
+def test_unsupported_options_are_rejected(knodes: list) -> None:
+    """Unknown formats and dtypes raise instead of writing unreadable exports."""
+    with pytest.raises(ValueError):
+        encode_knodes(knodes, "float", "float32")
+    with pytest.raises(ValueError):
+        encode_knodes(knodes, BLOCK_FORMAT, "int4")
+
+
+def test_envelope_without_encoding_passes_through() -> None:
+    """Plain envelopes decode to their knodes and no vectors."""
+    records, vectors = decode_knodes({"knodes": [{"text": "a"}]})
+    assert records == [{"text": "a"}]
+    assert vectors is None
@@ -0,0 +1,38 @@
+"""Tests for deferred imports of the action's heavy dependencies."""
+
+import os
+
+import pytest
+
+from typesense_vector_store_action.modules.lazy import (
+    LazyModule,
+    import_timings,
+    measure_import,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_lazy_module_imports_on_first_access() -> None:
+    """The wrapped module is imported and timed on first attribute access."""
+    module = LazyModule("json")
+    assert "deferred" in repr(module)
+    assert module.dumps({"a": 1}) == '{"a": 1}'
+    assert "loaded" in repr(module)
+    assert "json" in import_timings()
+
+
+def test_lazy_handles_load_no_heavy_modules() -> None:
+    """Importing the lazy handles leaves every deferred module unloaded."""
+    result = measure_import("typesense_vector_store_action.modules.lazy", cwd=ROOT)
+    assert result["resident"] == []
+
+
+def test_action_import_defers_heavy_modules() -> None:
+    """Loading the action imports nothing heavy beyond what jivas loads."""
+    pytest.importorskip("jivas")
+    baseline = measure_import("jivas.agent.action.vector_store_action", cwd=ROOT)
+    result = measure_import(
+        "typesense_vector_store_action.typesense_vector_store_action", cwd=ROOT
+    )
+    assert set(result["resident"]) <= set(baseline["resident"])
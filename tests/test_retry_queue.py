@@ -0,0 +1,151 @@
+"""Tests for the durable ingest retry queue."""
+
+import multiprocessing
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from typesense_vector_store_action.modules.retry_queue import RetryQueue, summarize
+
+
+def _doc(doc_id: str) -> Dict[str, Any]:
+    return {"id": doc_id, "text": doc_id, "vec": [0.1, 0.2]}
+
+
+def _failing(docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    return [(doc, "rejected") for doc in docs]
+
+
+def _succeeding(docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    return []
+
+
+@pytest.fixture
+def queue(tmp_path: Any) -> RetryQueue:
+    """A queue with a short backoff."""
+    return RetryQueue(
+        str(tmp_path / "docs"), max_attempts=3, base_delay=1.0, max_delay=4.0
+    )
+
+
+def test_backoff_doubles_up_to_the_maximum(queue: RetryQueue) -> None:
+    """Each attempt doubles the delay until max_delay."""
+    assert [queue._backoff(attempt) for attempt in range(5)] == [
+        1.0,
+        2.0,
+        4.0,
+        4.0,
+        4.0,
+    ]
+
+
+def test_entries_wait_for_their_backoff(queue: RetryQueue) -> None:
+    """Entries are not replayed before they are due unless forced."""
+    queue.enqueue([(_doc("a"), "timeout")])
+    assert queue.replay(_succeeding) == {"replayed": 0, "pending": 1, "dead_letters": 0}
+    assert queue.replay(_succeeding, force=True) == {
+        "replayed": 1,
+        "pending": 0,
+        "dead_letters": 0,
+    }
+    assert queue.pending() == []
+
+
+def test_entries_move_to_dead_letters_after_max_attempts(queue: RetryQueue) -> None:
+    """An entry failing max_attempts times is dead-lettered with its last error."""
+    queue.enqueue([(_doc("a"), "timeout")])
+    assert queue.replay(_failing, force=True)["dead_letters"] == 0
+    assert queue.pending()[0]["attempts"] == 2
+    assert queue.replay(_failing, force=True)["dead_letters"] == 1
+    assert queue.pending() == []
+    dead = queue.dead_letters()
+    assert summarize(dead[0])["error"] == "rejected"
+    assert dead[0]["document"]["vec"] == [0.1, 0.2]
+
+
+def test_replay_exception_fails_every_due_entry(queue: RetryQueue) -> None:
+    """A replay that raises counts as a failed attempt, not a lost entry."""
+
+    def _raising(docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+        raise ConnectionError("down")
+
+    queue.enqueue([(_doc("a"), "timeout"), (_doc("b"), "timeout")])
+    assert queue.replay(_raising, force=True)["pending"] == 2
+    assert {entry["error"] for entry in queue.pending()} == {"down"}
+
+
+def test_requeue_and_clear_dead_letters(queue: RetryQueue) -> None:
+    """Dead letters can be retried with a fresh budget or discarded."""
+    queue.enqueue([(_doc("a"), "timeout"), (_doc("b"), "timeout")])
+    queue.replay(_failing, force=True)
+    queue.replay(_failing, force=True)
+    assert len(queue.dead_letters()) == 2
+
+    assert queue.requeue_dead_letters() == 2
+    assert queue.dead_letters() == []
+    assert [entry["attempts"] for entry in queue.pending()] == [0, 0]
+    assert queue.replay(_succeeding)["replayed"] == 2
+
+    queue.enqueue([(_doc("c"), "timeout")])
+    queue.replay(_failing, force=True)
+    queue.replay(_failing, force=True)
+    assert queue.clear_dead_letters() == 1
+    assert queue.dead_letters() == []
+
+
+def test_discard_and_clear_drop_stale_entries(queue: RetryQueue) -> None:
+    """Rewritten or deleted documents leave the queue; clear empties it."""
+    queue.enqueue([(_doc("a"), "timeout"), (_doc("b"), "timeout")])
+    assert queue.discard(["a", "missing"]) == 1
+    assert [entry["document"]["id"] for entry in queue.pending()] == ["b"]
+    assert queue.clear() == 1
+    assert queue.pending() == []
+    assert queue.discard(["b"]) == 0
+
+
+def test_pending_entries_survive_a_restart(tmp_path: Any) -> None:
+    """A new queue over an existing file sees its entries and replays them."""
+    path = str(tmp_path / "docs")
+    RetryQueue(path, base_delay=0.01).enqueue([(_doc("a"), "timeout")])
+
+    restarted = RetryQueue(path, base_delay=0.01)
+    assert restarted.has_pending()
+    replayed = threading.Event()
+
+    def _replay(docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+        replayed.set()
+        return []
+
+    restarted.schedule(_replay)
+    assert replayed.wait(5)
+    worker = restarted._worker
+    if worker:
+        worker.join(5)
+    assert not restarted.has_pending()
+
+
+def test_corrupt_lines_are_skipped(queue: RetryQueue) -> None:
+    """A torn write does not make the rest of the queue unreadable."""
+    queue.enqueue([(_doc("a"), "timeout")])
+    with open(f"{queue._path}.jsonl", "a", encoding="utf-8") as file:
+        file.write('{"document": \n')
+    assert [entry["document"]["id"] for entry in queue.pending()] == ["a"]
+
+
+def _enqueue_from_process(args: Tuple[str, int]) -> None:
+    path, worker = args
+    queue = RetryQueue(path)
+    for i in range(25):
+        queue.enqueue([(_doc(f"{worker}-{i}"), "timeout")])
+
+
+def test_processes_share_a_queue(tmp_path: Any) -> None:
+    """Concurrent enqueues from several processes are all kept intact."""
+    path = str(tmp_path / "shared")
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        pool.map(_enqueue_from_process, [(path, worker) for worker in range(4)])
+    ids = {entry["document"]["id"] for entry in RetryQueue(path).pending()}
+    assert len(ids) == 100
+    assert os.path.exists(f"{path}.lock")
@@ -0,0 +1,68 @@
+"""Tests for tenant scoping of filters and ids in pooled collections."""
+
+import pytest
+
+from typesense_vector_store_action.modules.schema import (
+    strip_tenant,
+    tenant_document_id,
+    tenant_filter,
+    validate_filter,
+)
+
+TENANT = "urn:uuid:agent-a"
+SCOPE = f"tenant_id:=`{TENANT}`"
+
+
+@pytest.mark.parametrize(
+    "filter_by",
+    [
+        "metadata.source:=a.pdf",
+        "(metadata.page:>1 && metadata.page:<5) || metadata.source:=b.pdf",
+        "id:!=[`a`,`b`]",
+        "metadata.title:=`a) || (tenant_id:=other`",
+    ],
+)
+def test_balanced_filters_are_accepted(filter_by: str) -> None:
+    """Balanced filters pass through unchanged; backtick contents are literals."""
+    assert validate_filter(filter_by) == filter_by
+    assert tenant_filter(TENANT, filter_by) == f"{SCOPE} && ({filter_by})"
+
+
+@pytest.mark.parametrize(
+    "filter_by",
+    [
+        "metadata.source:=a.pdf) || (tenant_id:=other",
+        "metadata.source:=a.pdf) || tenant_id:!=x || (id:=y",
+        ") || (",
+        "id:=[`a`)",
+        "metadata.source:=a.pdf || (tenant_id:=other",
+        "metadata.source:=`a.pdf",
+        "metadata.page:>1]",
+    ],
+)
+def test_filters_escaping_the_tenant_scope_are_rejected(filter_by: str) -> None:
+    """A filter that could close the scope's parentheses raises."""
+    with pytest.raises(ValueError):
+        validate_filter(filter_by)
+    with pytest.raises(ValueError):
+        tenant_filter(TENANT, filter_by)
+
+
+def test_empty_filter_is_the_scope_alone() -> None:
+    """Without a filter only the tenant scope is applied."""
+    assert tenant_filter(TENANT) == SCOPE
+
+
+def test_tenant_ids_cannot_break_their_quotes() -> None:
+    """A tenant id containing a backtick is rejected."""
+    with pytest.raises(ValueError):
+        tenant_filter("a` || tenant_id:=`b")
+
+
+def test_stored_ids_carry_the_tenant() -> None:
+    """Ids are prefixed per tenant and only the own prefix is stripped."""
+    stored = tenant_document_id(TENANT, "doc-1")
+    assert stored == f"{TENANT}:doc-1"
+    assert tenant_document_id("other", "doc-1") != stored
+    assert strip_tenant(TENANT, stored) == "doc-1"
+    assert strip_tenant("other", stored) == stored
@@ -0,0 +1,75 @@
+"""Tests for shard routing and merging of grouped hits across shards."""
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from typesense_vector_store_action.modules.sharding import (  # noqa: E402
+    HashRing,
+    merge_groups,
+    shard_key_value,
+)
+
+SHARDS = [f"docs_shard_{i}" for i in range(4)]
+
+
+def test_hash_ring_routing_is_stable() -> None:
+    """The same key always maps to the same shard, across ring instances."""
+    keys = [f"doc-{i}" for i in range(200)]
+    first = [HashRing(SHARDS).get(key) for key in keys]
+    second = [HashRing(list(SHARDS)).get(key) for key in keys]
+    assert first == second
+    assert set(first) == set(SHARDS)
+
+
+def test_hash_ring_moves_few_keys_when_a_shard_is_added() -> None:
+    """Adding a shard only moves keys onto the new shard."""
+    keys = [f"doc-{i}" for i in range(1000)]
+    before = HashRing(SHARDS)
+    after = HashRing([*SHARDS, "docs_shard_4"])
+    moved = [key for key in keys if before.get(key) != after.get(key)]
+    assert all(after.get(key) == "docs_shard_4" for key in moved)
+    assert len(moved) < len(keys) / 2
+
+
+def test_hash_ring_requires_shards() -> None:
+    """An empty ring is rejected."""
+    with pytest.raises(ValueError):
+        HashRing([])
+
+
+def test_shard_key_value_falls_back_to_id() -> None:
+    """Documents missing the metadata key are routed by id."""
+    assert shard_key_value("a", {"source": "x.pdf"}, "source") == "x.pdf"
+    assert shard_key_value("a", {}, "source") == "a"
+    assert shard_key_value("a", {"source": "x.pdf"}, "id") == "a"
+
+
+def _hit(source: str, distance: float) -> tuple:
+    return (
+        Document(page_content=f"{source}-{distance}", metadata={"source": source}),
+        distance,
+    )
+
+
+def test_merge_groups_combines_groups_split_across_shards() -> None:
+    """A group returned by several shards comes back once, capped and ranked."""
+    shard_a = [_hit("a.pdf", 0.1), _hit("b.pdf", 0.3)]
+    shard_b = [_hit("a.pdf", 0.2), _hit("c.pdf", 0.25), _hit("a.pdf", 0.4)]
+    merged = merge_groups(shard_a + shard_b, "source", group_limit=2, k=2)
+    assert [(doc.metadata["source"], score) for doc, score in merged] == [
+        ("a.pdf", 0.1),
+        ("a.pdf", 0.2),
+        ("c.pdf", 0.25),
+    ]
+
+
+def test_merge_groups_keeps_hits_missing_the_key() -> None:
+    """Hits without the group key each form their own group."""
+    hits = [
+        (Document(page_content="x", metadata={}), 0.1),
+        (Document(page_content="y", metadata={}), 0.2),
+    ]
+    assert len(merge_groups(hits, "source", group_limit=1)) == 2
@@ -1,15 +1,23 @@
 """This module contains the Streamlit app for the Typesense Vector Store Action."""
 
 import json
+import threading
+from concurrent.futures import Future
 from io import BytesIO
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import streamlit as st
 import yaml
 from jvclient.lib.utils import call_api, get_reports_payload, jac_yaml_dumper
 from jvclient.lib.widgets import app_controls, app_header, app_update_action
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit_router import StreamlitRouter
 
+# Length of document text returned by the list_documents walker for previews
+PREVIEW_LENGTH = 500
+# Maximum number of listing pages kept in the client-side cache
+MAX_CACHED_PAGES = 20
+
 
 def render(
     router: StreamlitRouter, agent_id: str, action_id: str, info: Dict[str, Any]
@@ -39,6 +47,9 @@ def render(
     with st.expander("Export Knodes", False):
         _render_export_knodes(model_key, agent_id, module_root)
 
+    with st.expander("Collection Statistics", False):
+        _render_collection_stats(model_key, agent_id, module_root)
+
     with st.expander("Purge Collection", False):
         _render_purge_collection(model_key, agent_id, module_root)
 
@@ -54,24 +65,29 @@ def render(
         placeholder="e.g., metadata.job_id:=123 && metadata.page:=[1,2,3]",
     ).strip()
 
-    params = {
-        "page": st.session_state[list_key].get("page", 1),
-        "per_page": st.session_state[list_key].get("per_page", 10),
-        "filter_by": filter_by,
-        "agent_id": agent_id,
-    }
-
-    response = call_api(
-        endpoint="action/walker/typesense_vector_store_action/list_documents",
-        json_data=params,
+    page = st.session_state[list_key].get("page", 1)
+    per_page = st.session_state[list_key].get("per_page", 10)
+    result = _fetch_documents(
+        agent_id=agent_id,
+        list_key=list_key,
+        page=page,
+        per_page=per_page,
+        filter_by=filter_by,
     )
 
-    if response and response.status_code == 200:
-        result = get_reports_payload(response)
+    if result is not None:
         documents = result.get("documents", [])
         total_docs = result.get("total", 0)
 
         if documents:
+            if page * per_page < total_docs:
+                _prefetch_documents(
+                    agent_id=agent_id,
+                    list_key=list_key,
+                    page=page + 1,
+                    per_page=per_page,
+                    filter_by=filter_by,
+                )
             render_paginated_documents(
                 agent_id=agent_id,
                 list_key=list_key,
@@ -85,6 +101,151 @@ def render(
         st.error("Failed to fetch documents from the server.")
 
 
+def _documents_cache(list_key: str) -> Dict[Tuple[int, int, str], Any]:
+    """Return the client-side listing cache for the given list key.
+
+    Args:
+        list_key: The model key for session state
+
+    Returns:
+        Mapping of (page, per_page, filter_by) to list_documents payloads, or to
+        Futures of prefetches that have not been read yet
+    """
+    if list_key not in st.session_state:
+        st.session_state[list_key] = {}
+    return st.session_state[list_key].setdefault("cache", {})
+
+
+def _invalidate_documents_cache(list_key: str) -> None:
+    """Drop all cached listing pages after the collection has been modified.
+
+    Args:
+        list_key: The model key for session state
+    """
+    if list_key in st.session_state:
+        st.session_state[list_key]["cache"] = {}
+
+
+def _request_documents(
+    agent_id: str, page: int, per_page: int, filter_by: str
+) -> Optional[Dict[str, Any]]:
+    """Call the list_documents walker for a single page of previews.
+
+    Args:
+        agent_id: The agent ID
+        page: The page number
+        per_page: Number of documents per page
+        filter_by: Typesense filter expression
+
+    Returns:
+        The list_documents payload, or None if the request failed
+    """
+    response = call_api(
+        endpoint="action/walker/typesense_vector_store_action/list_documents",
+        json_data={
+            "page": page,
+            "per_page": per_page,
+            "filter_by": filter_by,
+            "preview_length": PREVIEW_LENGTH,
+            "agent_id": agent_id,
+        },
+    )
+    if response and response.status_code == 200:
+        return get_reports_payload(response)
+    return None
+
+
+def _store_documents(
+    cache: Dict[Tuple[int, int, str], Any],
+    key: Tuple[int, int, str],
+    result: Dict[str, Any],
+) -> None:
+    """Store a listing page in the cache, evicting the oldest pages when full.
+
+    Args:
+        cache: The listing cache
+        key: The (page, per_page, filter_by) cache key
+        result: The list_documents payload
+    """
+    cache[key] = result
+    while len(cache) > MAX_CACHED_PAGES:
+        cache.pop(next(iter(cache)))
+
+
+def _fetch_documents(
+    agent_id: str, list_key: str, page: int, per_page: int, filter_by: str
+) -> Optional[Dict[str, Any]]:
+    """Return a listing page from the cache, fetching it on a miss.
+
+    Args:
+        agent_id: The agent ID
+        list_key: The model key for session state
+        page: The page number
+        per_page: Number of documents per page
+        filter_by: Typesense filter expression
+
+    Returns:
+        The list_documents payload, or None if the request failed
+    """
+    cache = _documents_cache(list_key)
+    key = (page, per_page, filter_by)
+    if isinstance(cache.get(key), dict):
+        return cache[key]
+
+    # a prefetch for this page may still be in flight; wait for it instead of
+    # issuing a duplicate request. Only this thread writes to the cache.
+    pending = cache.get(key)
+    result = None
+    if isinstance(pending, Future):
+        try:
+            result = pending.result()
+        except Exception:
+            result = None
+
+    if result is None:
+        result = _request_documents(agent_id, page, per_page, filter_by)
+    if result is not None:
+        _store_documents(cache, key, result)
+    else:
+        cache.pop(key, None)
+    return result
+
+
+def _prefetch_documents(
+    agent_id: str, list_key: str, page: int, per_page: int, filter_by: str
+) -> None:
+    """Fetch a listing page on a background thread.
+
+    The cache holds a Future for the page until the script thread reads it;
+    the worker only completes the Future and never touches session state.
+
+    Args:
+        agent_id: The agent ID
+        list_key: The model key for session state
+        page: The page number
+        per_page: Number of documents per page
+        filter_by: Typesense filter expression
+    """
+    cache = _documents_cache(list_key)
+    key = (page, per_page, filter_by)
+    if key in cache:
+        return
+
+    future: Future = Future()
+
+    def _prefetch() -> None:
+        try:
+            future.set_result(_request_documents(agent_id, page, per_page, filter_by))
+        except Exception as e:
+            future.set_exception(e)
+
+    thread = threading.Thread(target=_prefetch, daemon=True)
+    # call_api reads the session token, so the thread needs the script context
+    add_script_run_ctx(thread, get_script_run_ctx())
+    cache[key] = future
+    thread.start()
+
+
 def render_paginated_documents(
     agent_id: str,
     list_key: str,
@@ -112,7 +273,7 @@ def render_paginated_documents(
         st.session_state[list_key]["edit_doc_id"] = None
     if "delete_doc_id" not in st.session_state[list_key]:
         st.session_state[list_key]["delete_doc_id"] = None
-    if "editable_metadata" not in st.session_state[list_key]:
+    if "editable" not in st.session_state[list_key]:
         st.session_state[list_key]["editable"] = {}
 
     # Items per page selection
@@ -212,6 +373,7 @@ def _render_delete_confirmation(
             "✅ Confirm", key=f"confirm_delete_{doc_id}"
         ) and call_delete_document(agent_id, module_root, doc_id):
             st.session_state[list_key]["delete_doc_id"] = None
+            _invalidate_documents_cache(list_key)
             st.rerun()
     with col2:
         if st.button("❌ Cancel", key=f"cancel_delete_{doc_id}"):
@@ -232,9 +394,14 @@ def _render_edit_mode(
         module_root: The module root path
     """
     with st.form(key=f"edit_form_{doc_id}"):
-        # Initialize editable metadata if not exists
+        # Initialize editable metadata if not exists; listings only carry text
+        # previews, so load the full document once when entering edit mode
         if doc_id not in st.session_state[list_key]["editable"]:
-            st.session_state[list_key]["editable"][doc_id] = doc.copy()
+            if doc.get("truncated"):
+                doc = call_get_document(agent_id, module_root, doc_id) or doc
+            editable = doc.copy()
+            editable.pop("truncated", None)
+            st.session_state[list_key]["editable"][doc_id] = editable
 
         editable_doc = st.session_state[list_key]["editable"][doc_id]
 
@@ -266,6 +433,8 @@ def _render_edit_mode(
                 agent_id, module_root, doc_id, editable_doc
             ):
                 st.session_state[list_key]["edit_doc_id"] = None
+                st.session_state[list_key]["editable"].pop(doc_id, None)
+                _invalidate_documents_cache(list_key)
                 st.rerun()
         with col2:
             if st.form_submit_button("❌ Cancel"):
@@ -283,7 +452,8 @@ def _render_view_mode(doc: Dict[str, Any], doc_id: str, list_key: str) -> None:
         list_key: The model key for session state
     """
     st.markdown(f"**Document ID:** `{doc_id}`")
-    st.text(doc["text"][:500] + "..." if len(doc["text"]) > 500 else doc["text"])
+    truncated = doc.get("truncated") or len(doc["text"]) > PREVIEW_LENGTH
+    st.text(doc["text"][:PREVIEW_LENGTH] + "..." if truncated else doc["text"])
 
     with st.expander("Metadata"):
         st.json(doc["metadata"])
@@ -395,6 +565,7 @@ def _render_import_knodes(model_key: str, agent_id: str, module_root: str) -> No
                 timeout=120,
             )
             if result:
+                _invalidate_documents_cache(f"{model_key}_documents_list")
                 st.success("Agent knode imported successfully")
             else:
                 st.error("Failed to import knodes. Ensure valid YAML/JSON format.")
@@ -421,6 +592,21 @@ def _render_export_knodes(model_key: str, agent_id: str, module_root: str) -> No
         value=False,
         key=f"{model_key}_with_ids",
     )
+    embedding_format = "float"
+    embedding_dtype = "float32"
+    if with_embeddings:
+        embedding_format = st.selectbox(
+            "Embedding encoding",
+            ("float", "block", "base64"),
+            key=f"{model_key}_embedding_format",
+            help="block and base64 store vectors as packed binary instead of float text",
+        )
+        if embedding_format != "float":
+            embedding_dtype = st.selectbox(
+                "Embedding precision",
+                ("float32", "float16", "int8"),
+                key=f"{model_key}_embedding_dtype",
+            )
 
     toggle_label = "Export as JSON" if as_json else "Export as YAML"
     st.caption(f"**{toggle_label} enabled**")
@@ -430,6 +616,8 @@ def _render_export_knodes(model_key: str, agent_id: str, module_root: str) -> No
             "as_json": as_json,
             "with_embeddings": with_embeddings,
             "with_ids": with_ids,
+            "embedding_format": embedding_format,
+            "embedding_dtype": embedding_dtype,
             "agent_id": agent_id,
         }
 
@@ -466,6 +654,43 @@ def _render_export_knodes(model_key: str, agent_id: str, module_root: str) -> No
             st.error("Failed to export knodes. Please check your inputs.")
 
 
+def _render_collection_stats(model_key: str, agent_id: str, module_root: str) -> None:
+    """Render collection statistics from cheap collection metadata.
+
+    Args:
+        model_key: The model key for session state
+        agent_id: The agent ID
+        module_root: The module root path
+    """
+    facet_by = st.text_input(
+        "Count documents by metadata keys",
+        value="",
+        key=f"{model_key}_stats_facet_by",
+        placeholder="e.g., source,job_id",
+    ).strip()
+
+    if st.button("Load statistics", key=f"{model_key}_btn_stats"):
+        result = call_api(
+            endpoint="action/walker/typesense_vector_store_action/get_stats",
+            json_data={"agent_id": agent_id, "facet_by": facet_by},
+        )
+        if result and result.status_code == 200:
+            stats = get_reports_payload(result) or {}
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Documents", stats.get("num_documents", 0))
+            col2.metric("Vector dimensions", stats.get("vector_dims", 0))
+            col3.metric(
+                "Approx. index size (MB)",
+                round(stats.get("approx_index_bytes", 0) / (1024 * 1024), 2),
+            )
+            if stats.get("facet_counts"):
+                st.json(stats["facet_counts"])
+            with st.expander("Schema fields"):
+                st.json(stats.get("fields", []))
+        else:
+            st.error("Failed to load collection statistics.")
+
+
 def _render_purge_collection(model_key: str, agent_id: str, module_root: str) -> None:
     """Render the collection purge UI.
 
@@ -508,6 +733,7 @@ def _render_purge_collection(model_key: str, agent_id: str, module_root: str) ->
                 ):
                     st.success("Collection purged successfully")
                     st.session_state[model_key]["page"] = 1
+                    _invalidate_documents_cache(f"{model_key}_documents_list")
                 else:
                     st.error("Failed to complete purge.")
                 st.session_state[purge_key] = False
@@ -542,6 +768,29 @@ def call_add_texts(
     return {}
 
 
+def call_get_document(agent_id: str, module_root: str, doc_id: str) -> Dict[str, Any]:
+    """Call the get_document walker in the Typesense Vector Store Action.
+
+    Args:
+        agent_id: The agent ID
+        module_root: The module root path
+        doc_id: The document ID to retrieve
+
+    Returns:
+        The full document, or an empty dictionary if it could not be retrieved
+    """
+    args = {"id": doc_id, "agent_id": agent_id}
+    result = call_api(
+        endpoint="action/walker/typesense_vector_store_action/get_document",
+        json_data=args,
+    )
+
+    if result and result.status_code == 200:
+        return get_reports_payload(result) or {}
+
+    return {}
+
+
 def call_delete_document(
     agent_id: str, module_root: str, doc_id: str
 ) -> Dict[str, Any]:
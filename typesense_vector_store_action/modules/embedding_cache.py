@@ -0,0 +1,487 @@
+"""Module for caching document embeddings on disk across workers and collections."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+fcntl: Optional[ModuleType]
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Reads refresh an entry's recency at most this often, keeping reads cheap
+TOUCH_INTERVAL = 60.0
+
+# Settings left out of the model identity: credentials, and knobs that do
+# not change the vectors a model returns
+SECRET_SETTINGS = ("key", "token", "secret", "password", "credential")
+TRANSPORT_SETTINGS = (
+    "chunk_size",
+    "max_retries",
+    "request_timeout",
+    "retry_min_seconds",
+    "retry_max_seconds",
+    "show_progress_bar",
+)
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+class EmbeddingCache:
+    """Embedding vectors stored in memory-mapped files with a SQLite index.
+
+    Each embedding model and vector size gets its own space: one float32
+    vector file divided into fixed-size slots. The index maps (space, content
+    hash) to a slot, a checksum of the stored vector and the time it was last
+    used. When a space reaches its share of ``max_bytes``, the least recently
+    used entries are evicted and their slots reused. Vectors of another size
+    are never returned for a model, so they count as misses.
+
+    Readers never take the write lock: the index runs in WAL mode, and a
+    vector whose slot was reused after its index row was read fails the
+    checksum and counts as a miss. Writers take an exclusive lock file so
+    several worker processes can share one cache directory.
+
+    Files used, in ``directory``:
+        ``index.sqlite3``: the index.
+        ``{space digest}_{dims}.f32``: vectors of one space.
+        ``cache.lock``: inter-process write lock.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024**3) -> None:
+        """Initialize the cache in the given directory."""
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._index_file = os.path.join(directory, "index.sqlite3")
+        self._lock_file = os.path.join(directory, "cache.lock")
+        self._thread_lock = threading.Lock()
+        self._local = threading.local()
+        self._vector_files: Dict[str, np.memmap] = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            connection = self._connection()
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS spaces ("
+                    "space TEXT PRIMARY KEY, model TEXT, dims INTEGER, "
+                    "next_slot INTEGER)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "space TEXT, hash TEXT, slot INTEGER, checksum INTEGER, "
+                    "last_used REAL, PRIMARY KEY (space, hash))"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS spaces_model ON spaces (model)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS entries_lru "
+                    "ON entries (space, last_used)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS free_slots ("
+                    "space TEXT, slot INTEGER, PRIMARY KEY (space, slot))"
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the index."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._index_file, timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the write lock across threads and processes."""
+        with self._thread_lock, open(self._lock_file, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _capacity(self, dims: int) -> int:
+        """Return the number of vectors a space may keep."""
+        return max(1, self._max_bytes // (dims * 4))
+
+    def _vector_path(self, space: str, dims: int) -> str:
+        """Return the vector file of a space."""
+        digest = hashlib.sha1(space.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._directory, f"{digest}_{dims}.f32")
+
+    def _vectors(self, space: str, dims: int, slots: int = 0) -> np.memmap:
+        """Map a space's vector file, growing it to hold at least ``slots``.
+
+        Only writers pass ``slots``; files are grown and never shrunk, so a
+        mapping stays valid while other processes write.
+        """
+        path = self._vector_path(space, dims)
+        size = slots * dims * 4
+        if slots and (not os.path.exists(path) or os.path.getsize(path) < size):
+            with open(path, "ab") as file:
+                file.truncate(size)
+        file_size = os.path.getsize(path)
+        mapped = self._vector_files.get(space)
+        if mapped is None or mapped.shape[0] * dims * 4 < file_size:
+            mapped = np.memmap(
+                path, dtype="<f4", mode="r+", shape=(file_size // (dims * 4), dims)
+            )
+            self._vector_files[space] = mapped
+        return mapped
+
+    @staticmethod
+    def _space(model: str, dims: int) -> str:
+        """Return the key of a model's vectors of one size."""
+        return f"{model}#{dims}"
+
+    def get_many(
+        self, model: str, hashes: List[str], dims: Optional[int] = None
+    ) -> List[Optional[List[float]]]:
+        """Look up vectors by content hash.
+
+        Args:
+            model: Identity of the embedding model.
+            hashes: Content hashes of the texts.
+            dims: Vector size the model returns, if known. When unknown, the
+                model's vectors are used only if they all have one size.
+
+        Returns:
+            The cached vector for each hash, or None where it is missing.
+        """
+        results: List[Optional[List[float]]] = [None] * len(hashes)
+        if not hashes:
+            return results
+        connection = self._connection()
+        sizes = [
+            size
+            for (size,) in connection.execute(
+                "SELECT dims FROM spaces WHERE model = ?", (model,)
+            )
+        ]
+        if dims is None and len(sizes) == 1:
+            dims = sizes[0]
+        if dims is None or dims not in sizes:
+            self.misses += len(hashes)
+            return results
+
+        space = self._space(model, dims)
+        entries: Dict[str, Tuple[int, int, float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        # stay well below SQLite's bound parameter limit
+        for start in range(0, len(unique), 500):
+            chunk = unique[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for content_hash, slot, checksum, last_used in connection.execute(
+                "SELECT hash, slot, checksum, last_used FROM entries "
+                f"WHERE space = ? AND hash IN ({placeholders})",
+                (space, *chunk),
+            ):
+                entries[content_hash] = (slot, checksum, last_used)
+
+        stale = []
+        now = time.time()
+        vectors = self._vectors(space, dims) if entries else None
+        for index, content_hash in enumerate(hashes):
+            entry = entries.get(content_hash)
+            if entry is None or vectors is None or entry[0] >= vectors.shape[0]:
+                continue
+            vector = np.array(vectors[entry[0]])
+            if zlib.crc32(vector.tobytes()) != entry[1]:
+                # the slot was reused after the index was read
+                continue
+            results[index] = vector.tolist()
+            if entry[2] < now - TOUCH_INTERVAL:
+                stale.append(content_hash)
+
+        found = sum(result is not None for result in results)
+        self.hits += found
+        self.misses += len(hashes) - found
+        if stale:
+            self._touch(space, stale, now)
+        return results
+
+    def _touch(self, space: str, hashes: List[str], now: float) -> None:
+        """Mark entries as recently used; skipped if the index is busy."""
+        try:
+            with self._connection() as connection:
+                connection.executemany(
+                    "UPDATE entries SET last_used = ? WHERE space = ? AND hash = ?",
+                    [(now, space, content_hash) for content_hash in hashes],
+                )
+        except sqlite3.OperationalError:
+            logger.debug("Embedding cache busy; recency update skipped")
+
+    def put_many(
+        self, model: str, hashes: List[str], vectors: List[List[float]]
+    ) -> None:
+        """Store vectors by content hash, evicting least recently used entries.
+
+        Args:
+            model: Identity of the embedding model.
+            hashes: Content hashes of the texts.
+            vectors: Embedding of each text.
+        """
+        if not hashes:
+            return
+        matrix = np.asarray(vectors, dtype="<f4")
+        dims = int(matrix.shape[1])
+        # a model returning another size gets a space of its own rather than
+        # replacing the vectors already stored
+        space = self._space(model, dims)
+        capacity = self._capacity(dims)
+        # a batch larger than the cache keeps only its tail
+        hashes, matrix = hashes[-capacity:], matrix[-capacity:]
+
+        with self._locked():
+            connection = self._connection()
+            with connection:
+                row = connection.execute(
+                    "SELECT next_slot FROM spaces WHERE space = ?", (space,)
+                ).fetchone()
+                if row is None:
+                    connection.execute(
+                        "INSERT INTO spaces (space, model, dims, next_slot) "
+                        "VALUES (?, ?, ?, 0)",
+                        (space, model, dims),
+                    )
+                    next_slot = 0
+                else:
+                    next_slot = row[0]
+
+                # overwriting an existing hash reuses its slot
+                slots = []
+                for content_hash in hashes:
+                    existing = connection.execute(
+                        "SELECT slot FROM entries WHERE space = ? AND hash = ?",
+                        (space, content_hash),
+                    ).fetchone()
+                    slots.append(existing[0] if existing else None)
+
+                needed = slots.count(None)
+                count = connection.execute(
+                    "SELECT COUNT(*) FROM entries WHERE space = ?", (space,)
+                ).fetchone()[0]
+                overflow = count + needed - capacity
+                if overflow > 0:
+                    self._evict(connection, space, overflow, set(hashes))
+
+                free = [
+                    slot
+                    for (slot,) in connection.execute(
+                        "SELECT slot FROM free_slots WHERE space = ? "
+                        "ORDER BY slot LIMIT ?",
+                        (space, needed),
+                    )
+                ]
+                connection.executemany(
+                    "DELETE FROM free_slots WHERE space = ? AND slot = ?",
+                    [(space, slot) for slot in free],
+                )
+                for index, slot in enumerate(slots):
+                    if slot is None:
+                        if free:
+                            slots[index] = free.pop(0)
+                        else:
+                            slots[index] = next_slot
+                            next_slot += 1
+
+                mapped = self._vectors(space, dims, next_slot)
+                for slot, vector in zip(slots, matrix):
+                    mapped[slot] = vector
+                # vectors reach the file before the index points at them
+                mapped.flush()
+
+                now = time.time()
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries "
+                    "(space, hash, slot, checksum, last_used) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (space, content_hash, slot, zlib.crc32(vector.tobytes()), now)
+                        for content_hash, slot, vector in zip(hashes, slots, matrix)
+                    ],
+                )
+                connection.execute(
+                    "UPDATE spaces SET next_slot = ? WHERE space = ?",
+                    (next_slot, space),
+                )
+
+    def _evict(
+        self,
+        connection: sqlite3.Connection,
+        space: str,
+        count: int,
+        keep: set,
+    ) -> None:
+        """Evict the least recently used entries and free their slots."""
+        victims = [
+            (content_hash, slot)
+            for content_hash, slot in connection.execute(
+                "SELECT hash, slot FROM entries WHERE space = ? "
+                "ORDER BY last_used LIMIT ?",
+                (space, count + len(keep)),
+            )
+            if content_hash not in keep
+        ][:count]
+        connection.executemany(
+            "DELETE FROM entries WHERE space = ? AND hash = ?",
+            [(space, content_hash) for content_hash, _ in victims],
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO free_slots (space, slot) VALUES (?, ?)",
+            [(space, slot) for _, slot in victims],
+        )
+        logger.debug(f"Evicted {len(victims)} cached embeddings for {space}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return the stored entries and bytes, and this process's hits and misses."""
+        entries = 0
+        size = 0
+        for dims, count in self._connection().execute(
+            "SELECT spaces.dims, COUNT(entries.hash) FROM spaces "
+            "LEFT JOIN entries ON entries.space = spaces.space "
+            "GROUP BY spaces.space"
+        ):
+            entries += count
+            size += count * dims * 4
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes_per_model": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def model_identity(embedding: Embeddings) -> str:
+    """Return a key identifying the model behind an embeddings instance.
+
+    Vectors are only reused between instances of the same class with the
+    same configuration: model name, output dimensions, endpoint, deployment
+    and any other plain settings. Credentials and private attributes are left
+    out, so rotating a key keeps the cache.
+    """
+    cls = type(embedding)
+    settings = {}
+    for name, value in sorted(vars(embedding).items()):
+        if (
+            name.startswith("_")
+            or name in TRANSPORT_SETTINGS
+            or any(secret in name.lower() for secret in SECRET_SETTINGS)
+        ):
+            continue
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            settings[name] = value
+        elif isinstance(value, (dict, list, tuple)):
+            try:
+                settings[name] = json.loads(json.dumps(value, sort_keys=True))
+            except (TypeError, ValueError):
+                continue
+    digest = hashlib.sha256(
+        json.dumps(settings, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{cls.__module__}.{cls.__qualname__}:{digest}"
+
+
+def expected_dims(embedding: Embeddings) -> Optional[int]:
+    """Return the vector size an embeddings instance is configured for, if any."""
+    for name in ("dimensions", "dims", "output_dimensionality"):
+        value = getattr(embedding, name, None)
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+
+def content_hash(text: str) -> str:
+    """Return the cache key of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings that consult an ``EmbeddingCache`` before the model.
+
+    Only documents are cached; queries go straight to the wrapped model.
+
+    Example:
+        .. code-block:: python
+
+            cache = get_embedding_cache("/var/cache/embeddings")
+            embedding = CachedEmbeddings(OpenAIEmbeddings(), cache)
+    """
+
+    def __init__(self, embedding: Embeddings, cache: EmbeddingCache) -> None:
+        """Initialize with the wrapped embeddings and the cache."""
+        self._embedding = embedding
+        self._cache = cache
+        self._model = model_identity(embedding)
+        self._dims = expected_dims(embedding)
+
+    @property
+    def embedding(self) -> Embeddings:
+        """Return the wrapped embeddings instance."""
+        return self._embedding
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the model only for texts not in the cache."""
+        hashes = [content_hash(text) for text in texts]
+        try:
+            vectors = self._cache.get_many(self._model, hashes, self._dims)
+        except Exception:
+            logger.exception("Embedding cache read failed")
+            vectors = [None] * len(texts)
+
+        missing: Dict[str, str] = {}
+        for content_key, text, vector in zip(hashes, texts, vectors):
+            if vector is None:
+                missing.setdefault(content_key, text)
+        by_hash: Dict[str, List[float]] = {}
+        if missing:
+            embedded = self._embedding.embed_documents(list(missing.values()))
+            if embedded:
+                # later lookups only accept vectors of the size the model returns
+                self._dims = len(embedded[0])
+            try:
+                self._cache.put_many(self._model, list(missing), embedded)
+            except Exception:
+                logger.exception("Embedding cache write failed")
+            by_hash = dict(zip(missing, embedded))
+
+        return [
+            vector if vector is not None else by_hash[content_key]
+            for content_key, vector in zip(hashes, vectors)
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query with the wrapped model."""
+        return self._embedding.embed_query(text)
+
+
+def get_embedding_cache(directory: str, **kwargs: int) -> EmbeddingCache:
+    """Return the process-wide cache for a directory, creating it on first use."""
+    with _caches_lock:
+        if directory not in _caches:
+            _caches[directory] = EmbeddingCache(directory, **kwargs)
+        return _caches[directory]
@@ -0,0 +1,151 @@
+"""Module for compact encoding of embedding vectors in knode exports."""
+
+from __future__ import annotations
+
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Vectors written as JSON/YAML float lists, as in plain exports
+FLOAT_FORMAT = "float"
+# Each knode carries its own base64 encoded vector
+BASE64_FORMAT = "base64"
+# Knodes carry no vectors; all vectors form one contiguous base64 block
+BLOCK_FORMAT = "block"
+
+EMBEDDING_FORMATS = (FLOAT_FORMAT, BASE64_FORMAT, BLOCK_FORMAT)
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(
+    vectors: np.ndarray, dtype: str
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Convert float vectors to the storage dtype.
+
+    int8 uses symmetric per-vector scaling so that the largest component of
+    each vector maps to 127.
+
+    Args:
+        vectors: Matrix of shape (count, dims).
+        dtype: One of ``EMBEDDING_DTYPES``.
+
+    Returns:
+        The converted matrix and, for int8, the per-vector scales.
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    if dtype != "int8":
+        return vectors.astype(dtype), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def dequantize(
+    data: bytes, dtype: str, dims: int, scales: Optional[List[float]] = None
+) -> np.ndarray:
+    """Decode raw vector bytes back into a float32 matrix.
+
+    Args:
+        data: Little-endian vector bytes.
+        dtype: One of ``EMBEDDING_DTYPES``.
+        dims: Number of dimensions per vector.
+        scales: Per-vector scales, required for int8.
+
+    Returns:
+        Matrix of shape (count, dims).
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    vectors = np.frombuffer(data, dtype=np.dtype(dtype).newbyteorder("<"))
+    vectors = vectors.reshape(-1, dims).astype(np.float32)
+    if dtype == "int8":
+        if scales is None:
+            raise ValueError("int8 vectors require scales")
+        vectors *= np.asarray(scales, dtype=np.float32)[:, None]
+    return vectors
+
+
+def encode_knodes(
+    knodes: List[Dict[str, Any]],
+    embedding_format: str = BLOCK_FORMAT,
+    dtype: str = "float32",
+) -> Dict[str, Any]:
+    """Encode the ``vec`` of each knode in a compact form.
+
+    Args:
+        knodes: Exported knodes, each with a ``vec`` float list.
+        embedding_format: ``base64`` or ``block``.
+        dtype: One of ``EMBEDDING_DTYPES``.
+
+    Returns:
+        Envelope with an ``embedding_encoding`` header, the ``knodes`` and,
+        for the block format, the ``vectors`` block and int8 ``scales``.
+    """
+    if embedding_format not in (BASE64_FORMAT, BLOCK_FORMAT):
+        raise ValueError(f"Unsupported embedding format: {embedding_format}")
+
+    vectors = np.asarray([knode["vec"] for knode in knodes], dtype=np.float32)
+    dims = int(vectors.shape[1]) if vectors.ndim == 2 else 0
+    encoded, scales = quantize(vectors.reshape(-1, dims or 1), dtype)
+    encoded = encoded.astype(encoded.dtype.newbyteorder("<"))
+
+    envelope: Dict[str, Any] = {
+        "embedding_encoding": {
+            "format": embedding_format,
+            "dtype": dtype,
+            "dims": dims,
+        },
+        "knodes": [],
+    }
+    for index, knode in enumerate(knodes):
+        record = {key: value for key, value in knode.items() if key != "vec"}
+        if embedding_format == BASE64_FORMAT:
+            record["vec"] = base64.b64encode(encoded[index].tobytes()).decode("ascii")
+            if scales is not None:
+                record["vec_scale"] = float(scales[index])
+        envelope["knodes"].append(record)
+
+    if embedding_format == BLOCK_FORMAT:
+        envelope["vectors"] = base64.b64encode(encoded.tobytes()).decode("ascii")
+        if scales is not None:
+            envelope["scales"] = scales.tolist()
+    return envelope
+
+
+def decode_knodes(
+    envelope: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+    """Decode an envelope produced by ``encode_knodes``.
+
+    Args:
+        envelope: The encoded export.
+
+    Returns:
+        The knodes without vectors and a float32 matrix with one row per
+        knode, or None if the envelope carries no encoded vectors.
+    """
+    knodes = envelope.get("knodes", [])
+    encoding = envelope.get("embedding_encoding")
+    if not encoding or not knodes:
+        return knodes, None
+
+    dtype = encoding["dtype"]
+    dims = encoding["dims"]
+    if encoding["format"] == BLOCK_FORMAT:
+        data = base64.b64decode(envelope["vectors"])
+        vectors = dequantize(data, dtype, dims, envelope.get("scales"))
+    elif encoding["format"] == BASE64_FORMAT:
+        data = b"".join(base64.b64decode(knode["vec"]) for knode in knodes)
+        scales = [knode["vec_scale"] for knode in knodes] if dtype == "int8" else None
+        vectors = dequantize(data, dtype, dims, scales)
+    else:
+        raise ValueError(f"Unsupported embedding format: {encoding['format']}")
+
+    records = [
+        {key: value for key, value in knode.items() if key not in ("vec", "vec_scale")}
+        for knode in knodes
+    ]
+    return records, vectors
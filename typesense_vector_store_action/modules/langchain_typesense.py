@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import logging
+import time
 import uuid
 from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
 
@@ -10,10 +12,26 @@ from langchain_core.embeddings import Embeddings
 from langchain_core.utils import get_from_env
 from langchain_core.vectorstores import VectorStore
 
+from .retry_queue import RetryQueue
+from .schema import (
+    CREATED_AT_FIELD,
+    TENANT_FIELD,
+    UPDATED_AT_FIELD,
+    strip_tenant,
+    tenant_document_id,
+    tenant_filter,
+)
+
 if TYPE_CHECKING:
     from typesense.client import Client
     from typesense.collection import Collection
 
+logger = logging.getLogger(__name__)
+
+# Nearest-neighbour candidates considered per requested hit when grouping, so
+# that enough distinct groups survive to fill k
+GROUP_CANDIDATE_FACTOR = 10
+
 
 class Typesense(VectorStore):
     """`Typesense` vector store.
@@ -58,6 +76,11 @@ class Typesense(VectorStore):
         typesense_collection_name: Optional[str] = None,
         text_key: str = "text",
         per_page: int = 100,
+        facet_fields: Optional[List[str]] = None,
+        group_by: Optional[str] = None,
+        group_limit: int = 1,
+        retry_queue: Optional[RetryQueue] = None,
+        tenant_id: Optional[str] = None,
     ) -> None:
         """Initialize with Typesense client."""
         try:
@@ -79,6 +102,15 @@ class Typesense(VectorStore):
         )
         self._text_key = text_key
         self._per_page = per_page
+        self._facet_fields = facet_fields or []
+        self._group_by = group_by
+        self._group_limit = group_limit
+        self._retry_queue = retry_queue
+        self._tenant_id = tenant_id
+        if retry_queue and retry_queue.has_pending():
+            # entries left by a worker that has since restarted are replayed
+            # without waiting for the next failure on this collection
+            retry_queue.schedule(self._replay_documents)
 
     @property
     def _collection(self) -> Collection:
@@ -103,21 +135,60 @@ class Typesense(VectorStore):
             metadatas: Optional list of metadata dictionaries for each text.
             ids: Optional list of unique IDs for each text.
 
+        Returns:
+            A list of dictionaries representing the documents to be added to Typesense.
+        """
+        texts = list(texts)
+        embedded_texts = self._embedding.embed_documents(texts)
+        return self._prep_documents(texts, embedded_texts, metadatas, ids)
+
+    def _prep_documents(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]],
+        ids: Optional[List[str]],
+    ) -> List[Dict[str, Any]]:
+        """Create the documents for Typesense from already computed embeddings.
+
+        Args:
+            texts: List of strings to prepare.
+            embeddings: Embedding vector for each text.
+            metadatas: Optional list of metadata dictionaries for each text.
+            ids: Optional list of unique IDs for each text.
+
         Returns:
             A list of dictionaries representing the documents to be added to Typesense.
         """
         _ids = ids or [str(uuid.uuid4()) for _ in texts]
         _metadatas: Iterable[Dict[str, Any]] = metadatas or [{} for _ in texts]
-        embedded_texts = self._embedding.embed_documents(list(texts))
-        return [
+        # nanosecond base plus the batch offset keeps the sequence strictly
+        # increasing within a batch and across consecutive batches
+        created_at = time.time_ns()
+        docs: List[Dict[str, Any]] = [
             {
                 "id": _id,
                 "vec": vec,
                 self._text_key: text,
                 "metadata": metadata,
+                CREATED_AT_FIELD: created_at + offset,
+                UPDATED_AT_FIELD: created_at + offset,
             }
-            for _id, vec, text, metadata in zip(_ids, embedded_texts, texts, _metadatas)
+            for offset, (_id, vec, text, metadata) in enumerate(
+                zip(_ids, embeddings, texts, _metadatas)
+            )
         ]
+        if self._tenant_id:
+            for doc in docs:
+                doc["id"] = tenant_document_id(self._tenant_id, doc["id"])
+                doc[TENANT_FIELD] = self._tenant_id
+        return docs
+
+    def _public_id(self, stored_id: str) -> str:
+        """Return a stored id without the tenant prefix of pooled collections."""
+        if self._tenant_id:
+            return strip_tenant(self._tenant_id, stored_id)
+        return stored_id
 
     def _create_collection(self, num_dim: int) -> None:
         """Create a Typesense collection with the specified number of dimensions."""
@@ -128,6 +199,23 @@ class Typesense(VectorStore):
                 "name": "metadata",
                 "type": "object",
             },  # add metadata to schema for filtering compatibility
+            {"name": CREATED_AT_FIELD, "type": "int64", "sort": True},
+            {"name": UPDATED_AT_FIELD, "type": "int64", "sort": True},
+            # scopes every read and write when several agents share a collection
+            {"name": TENANT_FIELD, "type": "string", "optional": True},
+            # metadata keys that support facet counts; auto-detected fields are
+            # not facetable, so these must be declared up front
+            *[
+                {
+                    "name": f"metadata.{key}",
+                    "type": "auto",
+                    "facet": True,
+                    "optional": True,
+                }
+                for key in dict.fromkeys(
+                    self._facet_fields + ([self._group_by] if self._group_by else [])
+                )
+            ],
             {"name": ".*", "type": "auto"},
         ]
         self._typesense_client.collections.create(
@@ -156,16 +244,100 @@ class Typesense(VectorStore):
             List of ids from adding the texts into the vectorstore.
 
         """
+        docs = self._prep_texts(texts, metadatas, ids)
+        return self.upsert_documents(docs)
+
+    def upsert_documents(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """Upsert prepared documents, creating the collection if needed.
+
+        Documents that fail, individually or because the whole request
+        failed, are placed on the retry queue with their embeddings when one
+        is configured, and replayed in the background.
+
+        Args:
+            docs: Documents as produced by ``_prep_texts`` or ``_prep_documents``.
+
+        Returns:
+            List of ids of the upserted or queued documents, without the
+            tenant prefix of pooled collections.
+        """
+        if not docs:
+            return []
+        if self._retry_queue:
+            # queued copies of these documents are stale once they are rewritten;
+            # dropping them first also waits out a replay already in progress
+            self._retry_queue.discard(doc["id"] for doc in docs)
+        try:
+            failures = self._import_documents(docs)
+        except Exception as e:
+            if not self._retry_queue:
+                raise
+            failures = [(doc, str(e)) for doc in docs]
+
+        if failures:
+            if self._retry_queue:
+                self._retry_queue.enqueue(failures)
+                self._retry_queue.schedule(self._replay_documents)
+            else:
+                logger.warning(
+                    f"{len(failures)} documents failed to import into "
+                    f"{self._typesense_collection_name}: {failures[0][1]}"
+                )
+        return [self._public_id(doc["id"]) for doc in docs]
+
+    def _import_documents(
+        self, docs: List[Dict[str, Any]], create_collection: bool = True
+    ) -> List[Tuple[Dict[str, Any], str]]:
+        """Import documents and return the ones Typesense rejected.
+
+        Args:
+            docs: Prepared documents to upsert.
+            create_collection: Create the collection if it does not exist.
+
+        Returns:
+            Pairs of each failed document and its error.
+        """
         from typesense.exceptions import ObjectNotFound
 
-        docs = self._prep_texts(texts, metadatas, ids)
+        # stamped when the request is sent rather than when the document was
+        # prepared, so slow batches and retry replays are not hidden behind a
+        # delta export watermark handed out in the meantime
+        updated_at = time.time_ns()
+        for offset, doc in enumerate(docs):
+            doc[UPDATED_AT_FIELD] = updated_at + offset
+
         try:
-            self._collection.documents.import_(docs, {"action": "upsert"})
+            results = self._collection.documents.import_(docs, {"action": "upsert"})
         except ObjectNotFound:
+            if not create_collection:
+                raise
             # Create the collection if it doesn't already exist
             self._create_collection(len(docs[0]["vec"]))
-            self._collection.documents.import_(docs, {"action": "upsert"})
-        return [doc["id"] for doc in docs]
+            results = self._collection.documents.import_(docs, {"action": "upsert"})
+        return [
+            (doc, result.get("error", "unknown error"))
+            for doc, result in zip(docs, results)
+            if not result.get("success")
+        ]
+
+    def _replay_documents(
+        self, docs: List[Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], str]]:
+        """Import queued documents without re-creating a deleted collection."""
+        return self._import_documents(docs, create_collection=False)
+
+    def replay_retry_queue(self, force: bool = False) -> Dict[str, int]:
+        """Replay queued documents now instead of waiting for the backoff.
+
+        Args:
+            force: Retry every queued document regardless of its backoff.
+
+        Returns:
+            Counts of replayed, still pending and dead-lettered documents.
+        """
+        if not self._retry_queue:
+            return {"replayed": 0, "pending": 0, "dead_letters": 0}
+        return self._retry_queue.replay(self._replay_documents, force=force)
 
     def similarity_search_with_score(
         self,
@@ -173,6 +345,8 @@ class Typesense(VectorStore):
         k: int = 0,
         filter: Optional[str] = "",
         kwargs: Optional[dict] = None,
+        group_by: Optional[str] = None,
+        group_limit: Optional[int] = None,
     ) -> List[Tuple[Document, float]]:
         """Return typesense documents most similar to query, along with scores.
 
@@ -180,11 +354,50 @@ class Typesense(VectorStore):
             query: Text to look up documents similar to.
             k: Number of Documents to return. Defaults to 10.
             filter: typesense filter_by expression to filter documents on.
+            group_by: Metadata key to group hits on, returning at most
+                group_limit hits per distinct value. Defaults to the
+                store's group_by; pass an empty string to disable grouping.
+            group_limit: Maximum number of hits per group.
 
         Returns:
             List of Documents most similar to the query and score for each.
+            Grouped results are ordered group by group, best group first.
         """
-        embedded_query = [str(x) for x in self._embedding.embed_query(query)]
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query),
+            k=k,
+            filter=filter,
+            kwargs=kwargs,
+            group_by=group_by,
+            group_limit=group_limit,
+        )
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 0,
+        filter: Optional[str] = "",
+        kwargs: Optional[dict] = None,
+        group_by: Optional[str] = None,
+        group_limit: Optional[int] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Return typesense documents most similar to an embedding, with scores.
+
+        Args:
+            embedding: Query embedding to look up documents similar to.
+            k: Number of Documents to return.
+            filter: typesense filter_by expression to filter documents on.
+            group_by: Metadata key to group hits on; see
+                ``similarity_search_with_score``.
+            group_limit: Maximum number of hits per group.
+
+        Returns:
+            List of Documents most similar to the embedding and score for each.
+        """
+        group_by = self._group_by if group_by is None else group_by
+        group_limit = group_limit or self._group_limit
+
+        embedded_query = [str(x) for x in embedding]
         query_obj = {
             "q": "*",
             "vector_query": f"vec:([{','.join(embedded_query)}], k:{k})",
@@ -192,24 +405,47 @@ class Typesense(VectorStore):
             "collection": self._typesense_collection_name,
             "per_page": self._per_page,
         }
+        if group_by:
+            # per_page counts groups; widen the neighbour pool so that k
+            # distinct groups can be found in a single request
+            candidates = max(k, 1) * group_limit * GROUP_CANDIDATE_FACTOR
+            query_obj.update(
+                {
+                    "vector_query": (
+                        f"vec:([{','.join(embedded_query)}], k:{candidates})"
+                    ),
+                    "group_by": f"metadata.{group_by}",
+                    "group_limit": group_limit,
+                    "per_page": k or self._per_page,
+                }
+            )
         if kwargs:
             query_obj.update(kwargs)
+        if self._tenant_id:
+            # applied last so that kwargs cannot widen the search past the tenant
+            query_obj["filter_by"] = tenant_filter(
+                self._tenant_id, str(query_obj.get("filter_by") or "")
+            )
 
-        docs = []
+        docs: List[Tuple[Document, float]] = []
         response = self._typesense_client.multi_search.perform(
             {"searches": [query_obj]}, {}
         )
-        if (
-            response["results"]
-            and len(response["results"]) > 0
-            and "hits" in response["results"][0]
-        ):
-            for hit in response["results"][0]["hits"]:
-                document = hit["document"]
-                metadata = document["metadata"]
-                text = document[self._text_key]
-                score = hit["vector_distance"]
-                docs.append((Document(page_content=text, metadata=metadata), score))
+        if not response["results"]:
+            return docs
+
+        result = response["results"][0]
+        if "grouped_hits" in result:
+            hits = [hit for group in result["grouped_hits"] for hit in group["hits"]]
+        else:
+            hits = result.get("hits", [])
+
+        for hit in hits:
+            document = hit["document"]
+            metadata = document["metadata"]
+            text = document[self._text_key]
+            score = hit["vector_distance"]
+            docs.append((Document(page_content=text, metadata=metadata), score))
         return docs
 
     def similarity_search(
@@ -0,0 +1,128 @@
+"""Module for deferring the action's heavy dependencies until first use."""
+
+from __future__ import annotations
+
+import importlib
+import json
+import logging
+import subprocess
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent importing each deferred module, recorded on first use
+IMPORT_TIMINGS: Dict[str, float] = {}
+
+# Heavy top-level modules that loading the action must not import
+DEFERRED_MODULES = ("typesense", "yaml", "numpy", "langchain_core")
+
+_import_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    Example:
+        .. code-block:: python
+
+            typesense = LazyModule("typesense")
+            client = typesense.Client(config)  # typesense is imported here
+    """
+
+    def __init__(self, name: str, package: Optional[str] = None) -> None:
+        """Record the module to import without importing it."""
+        self._lazy_name = name
+        self._lazy_package = package
+        self._lazy_module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        """Import the module once, recording how long the import took."""
+        if self._lazy_module is None:
+            with _import_lock:
+                if self._lazy_module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(
+                        self._lazy_name, self._lazy_package
+                    )
+                    IMPORT_TIMINGS[module.__name__] = time.perf_counter() - started
+                    logger.debug(
+                        f"Deferred import of {module.__name__} took "
+                        f"{IMPORT_TIMINGS[module.__name__]:.3f}s"
+                    )
+                    self._lazy_module = module
+        return self._lazy_module
+
+    def __getattr__(self, attr: str) -> Any:
+        """Import the module if needed and return the requested attribute."""
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        """Return a representation that does not trigger the import."""
+        state = "loaded" if self._lazy_module is not None else "deferred"
+        return f"<LazyModule {self._lazy_name} ({state})>"
+
+
+def import_timings() -> Dict[str, float]:
+    """Return the seconds spent on each deferred import so far."""
+    return dict(IMPORT_TIMINGS)
+
+
+def resident_modules(names: Sequence[str] = DEFERRED_MODULES) -> List[str]:
+    """Return which of the named top-level modules are already imported."""
+    return [name for name in names if name in sys.modules]
+
+
+def measure_import(
+    module: str, names: Sequence[str] = DEFERRED_MODULES, cwd: Optional[str] = None
+) -> Dict[str, Any]:
+    """Measure the cold-start cost of importing a module.
+
+    The import runs in a fresh interpreter so that nothing is already
+    resident. Jac modules are importable once ``jaclang`` is loaded, which
+    happens first and is not counted.
+
+    Args:
+        module: Dotted name of the module to import, e.g.
+            ``typesense_vector_store_action.typesense_vector_store_action``.
+        names: Top-level modules to report as resident after the import.
+        cwd: Directory to run the interpreter in.
+
+    Returns:
+        The seconds the import took and which of ``names`` it loaded.
+    """
+    script = (
+        "import importlib, json, sys, time\n"
+        "try:\n"
+        "    import jaclang  # noqa: F401\n"
+        "except ImportError:\n"
+        "    pass\n"
+        "names = json.loads(sys.argv[2])\n"
+        "before = {name for name in names if name in sys.modules}\n"
+        "started = time.perf_counter()\n"
+        "importlib.import_module(sys.argv[1])\n"
+        "seconds = time.perf_counter() - started\n"
+        "resident = [n for n in names if n in sys.modules and n not in before]\n"
+        "print(json.dumps({'seconds': seconds, 'resident': resident}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script, module, json.dumps(list(names))],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=cwd,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# Dependencies of the action that are only needed once the vector store is used
+typesense = LazyModule("typesense")
+yaml = LazyModule("yaml")
+langchain_typesense = LazyModule(".langchain_typesense", __package__)
+sharding = LazyModule(".sharding", __package__)
+embedding_codec = LazyModule(".embedding_codec", __package__)
+retry_queue = LazyModule(".retry_queue", __package__)
+embedding_cache = LazyModule(".embedding_cache", __package__)
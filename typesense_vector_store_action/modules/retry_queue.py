@@ -0,0 +1,317 @@
+"""Module for durably retrying failed Typesense ingest batches."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+fcntl: Optional[ModuleType]
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Upserts documents and returns the ones that failed with their error
+ReplayFn = Callable[[List[Dict[str, Any]]], List[Tuple[Dict[str, Any], str]]]
+
+_queues: Dict[str, RetryQueue] = {}
+_queues_lock = threading.Lock()
+
+
+class RetryQueue:
+    """Append-only on-disk queue of documents whose upsert failed.
+
+    Each entry keeps the prepared document, embedding included, so a retry
+    never re-embeds. Entries are replayed with exponential backoff on a
+    background thread; entries that fail ``max_attempts`` times move to a
+    dead-letter file. All file access is serialised with an exclusive lock
+    file so that several worker processes can share a queue.
+
+    Files used, for a queue at ``path``:
+        ``{path}.jsonl``: pending entries, one JSON object per line.
+        ``{path}.dead.jsonl``: entries that exhausted their attempts.
+        ``{path}.lock``: inter-process lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+    ) -> None:
+        """Initialize the queue at the given path prefix."""
+        self._path = path
+        self._queue_file = f"{path}.jsonl"
+        self._dead_letter_file = f"{path}.dead.jsonl"
+        self._lock_file = f"{path}.lock"
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._thread_lock = threading.Lock()
+        self._worker_lock = threading.Lock()
+        self._replay_fn: Optional[ReplayFn] = None
+        self._worker: Optional[threading.Thread] = None
+        self._scheduled = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the queue lock across threads and processes."""
+        with self._thread_lock, open(self._lock_file, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, Any]]:
+        """Read all entries of a JSON lines file, skipping torn writes."""
+        entries: List[Dict[str, Any]] = []
+        if not os.path.exists(path):
+            return entries
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt retry queue entry in {path}")
+        return entries
+
+    @staticmethod
+    def _append(path: str, entries: List[Dict[str, Any]]) -> None:
+        """Append entries to a JSON lines file and flush them to disk."""
+        if not entries:
+            return
+        with open(path, "a", encoding="utf-8") as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _rewrite(self, entries: List[Dict[str, Any]]) -> None:
+        """Atomically replace the pending entries."""
+        tmp_file = f"{self._queue_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self._queue_file)
+
+    def _backoff(self, attempts: int) -> float:
+        """Return the delay before the next attempt."""
+        return min(self._max_delay, self._base_delay * 2**attempts)
+
+    def enqueue(self, failures: List[Tuple[Dict[str, Any], str]]) -> None:
+        """Durably record failed documents for retry.
+
+        Args:
+            failures: Pairs of prepared document and the error it failed with.
+        """
+        now = time.time()
+        entries = [
+            {
+                "document": document,
+                "error": error,
+                "attempts": 1,
+                "failed_at": now,
+                "next_attempt_at": now + self._backoff(1),
+            }
+            for document, error in failures
+        ]
+        with self._locked():
+            self._append(self._queue_file, entries)
+        logger.warning(f"Queued {len(entries)} documents for retry in {self._path}")
+
+    def replay(self, replay_fn: ReplayFn, force: bool = False) -> Dict[str, int]:
+        """Retry pending entries that are due.
+
+        Args:
+            replay_fn: Upserts documents and returns the failures.
+            force: Retry every pending entry regardless of its backoff.
+
+        Returns:
+            Counts of replayed, still pending and dead-lettered entries.
+        """
+        now = time.time()
+        with self._locked():
+            entries = self._read(self._queue_file)
+            due = [e for e in entries if force or e["next_attempt_at"] <= now]
+            waiting = [e for e in entries if not (force or e["next_attempt_at"] <= now)]
+            if not due:
+                return {"replayed": 0, "pending": len(waiting), "dead_letters": 0}
+
+            try:
+                failures = {
+                    document["id"]: error
+                    for document, error in replay_fn([e["document"] for e in due])
+                }
+            except Exception as e:
+                failures = {entry["document"]["id"]: str(e) for entry in due}
+
+            dead = []
+            for entry in due:
+                doc_id = entry["document"]["id"]
+                if doc_id not in failures:
+                    continue
+                entry["attempts"] += 1
+                entry["error"] = failures[doc_id]
+                entry["failed_at"] = now
+                if entry["attempts"] >= self._max_attempts:
+                    dead.append(entry)
+                else:
+                    entry["next_attempt_at"] = now + self._backoff(entry["attempts"])
+                    waiting.append(entry)
+
+            self._append(self._dead_letter_file, dead)
+            self._rewrite(waiting)
+
+        if dead:
+            logger.error(f"Moved {len(dead)} documents to dead letters in {self._path}")
+        return {
+            "replayed": len(due) - len(failures),
+            "pending": len(waiting),
+            "dead_letters": len(dead),
+        }
+
+    def schedule(self, replay_fn: ReplayFn) -> None:
+        """Replay pending entries in the background until the queue is empty.
+
+        Args:
+            replay_fn: Upserts documents and returns the failures; the most
+                recently scheduled function is used for later replays.
+        """
+        with self._worker_lock:
+            self._replay_fn = replay_fn
+            self._scheduled = True
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run, name=f"retry-queue-{self._path}", daemon=True
+            )
+            self._worker.start()
+
+    def has_pending(self) -> bool:
+        """Return whether the queue file holds entries, without taking the lock."""
+        try:
+            return os.path.getsize(self._queue_file) > 0
+        except OSError:
+            return False
+
+    def _run(self) -> None:
+        """Background loop sleeping until the next entry is due."""
+        while True:
+            entries = self.pending()
+            if not entries:
+                with self._worker_lock:
+                    # an enqueue may have raced the empty read; look once more
+                    if self._scheduled:
+                        self._scheduled = False
+                        continue
+                    self._worker = None
+                    return
+            next_attempt_at = min(entry["next_attempt_at"] for entry in entries)
+            time.sleep(max(0.0, next_attempt_at - time.time()))
+            try:
+                if self._replay_fn:
+                    self.replay(self._replay_fn)
+            except Exception:
+                logger.exception(f"Retry queue replay failed in {self._path}")
+                time.sleep(self._base_delay)
+
+    def discard(self, ids: Iterable[str]) -> int:
+        """Drop pending entries for documents that were deleted or rewritten.
+
+        Waits for a replay in progress, so once this returns no stale copy of
+        these documents can be written by the queue.
+
+        Args:
+            ids: Ids of the documents to drop.
+
+        Returns:
+            The number of entries dropped.
+        """
+        ids = set(ids)
+        if not ids or not os.path.exists(self._queue_file):
+            return 0
+        with self._locked():
+            entries = self._read(self._queue_file)
+            kept = [e for e in entries if e["document"]["id"] not in ids]
+            if len(kept) < len(entries):
+                self._rewrite(kept)
+        return len(entries) - len(kept)
+
+    def clear(self) -> int:
+        """Discard all pending entries and dead letters."""
+        with self._locked():
+            entries = self._read(self._queue_file) + self._read(self._dead_letter_file)
+            for path in (self._queue_file, self._dead_letter_file):
+                if os.path.exists(path):
+                    os.remove(path)
+        return len(entries)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Return the pending entries."""
+        with self._locked():
+            return self._read(self._queue_file)
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Return the dead-lettered entries."""
+        with self._locked():
+            return self._read(self._dead_letter_file)
+
+    def requeue_dead_letters(self) -> int:
+        """Move dead letters back to the queue with a fresh attempt budget."""
+        with self._locked():
+            dead = self._read(self._dead_letter_file)
+            now = time.time()
+            for entry in dead:
+                entry["attempts"] = 0
+                entry["next_attempt_at"] = now
+            self._append(self._queue_file, dead)
+            if os.path.exists(self._dead_letter_file):
+                os.remove(self._dead_letter_file)
+        return len(dead)
+
+    def clear_dead_letters(self) -> int:
+        """Discard all dead letters."""
+        with self._locked():
+            dead = self._read(self._dead_letter_file)
+            if os.path.exists(self._dead_letter_file):
+                os.remove(self._dead_letter_file)
+        return len(dead)
+
+
+def get_retry_queue(path: str, **kwargs: Any) -> RetryQueue:
+    """Return the process-wide queue for a path, creating it on first use.
+
+    Sharing one instance per path keeps a single background worker per queue
+    however many vector store wrappers are constructed.
+    """
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = RetryQueue(path, **kwargs)
+        return _queues[path]
+
+
+def summarize(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Return an entry without its document body, for inspection."""
+    return {
+        "id": entry["document"].get("id"),
+        "attempts": entry.get("attempts"),
+        "error": entry.get("error"),
+        "failed_at": entry.get("failed_at"),
+        "next_attempt_at": entry.get("next_attempt_at"),
+    }
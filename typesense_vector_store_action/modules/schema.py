@@ -0,0 +1,77 @@
+"""Field names shared by the Typesense collection schema and the action."""
+
+from typing import List
+
+# Monotonic sequence field used for stable keyset (cursor) pagination
+CREATED_AT_FIELD = "created_at"
+# Last write time in nanoseconds, used as the watermark for delta exports
+UPDATED_AT_FIELD = "updated_at"
+# Owning agent of a document in collections pooled across agents
+TENANT_FIELD = "tenant_id"
+
+
+def validate_filter(filter_by: str) -> str:
+    """Check that a filter_by expression stays inside the parentheses around it.
+
+    A filter such as ``a:=1) || (b:=1`` would close the parentheses it is
+    wrapped in and OR its way past the scope it is combined with. Brackets
+    and parentheses must balance and backtick quotes must close; anything
+    inside backticks is a literal.
+
+    Args:
+        filter_by: The filter expression supplied by a caller.
+
+    Returns:
+        The filter expression unchanged.
+
+    Raises:
+        ValueError: If the expression could escape its parentheses.
+    """
+    closing = {")": "(", "]": "["}
+    stack: List[str] = []
+    quoted = False
+    for char in filter_by:
+        if char == "`":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char in "([":
+            stack.append(char)
+        elif char in closing and (not stack or stack.pop() != closing[char]):
+            raise ValueError(f"Unbalanced filter_by expression: {filter_by}")
+    if quoted or stack:
+        raise ValueError(f"Unbalanced filter_by expression: {filter_by}")
+    return filter_by
+
+
+def tenant_filter(tenant_id: str, filter_by: str = "") -> str:
+    """Scope a Typesense filter_by expression to a single tenant.
+
+    Args:
+        tenant_id: The tenant to restrict to; backtick quoted since agent ids
+            contain characters that are special in filter expressions.
+        filter_by: Optional filter expression to combine with; rejected by
+            ``validate_filter`` if it could widen the scope.
+
+    Returns:
+        The combined filter expression.
+    """
+    if "`" in tenant_id:
+        raise ValueError(f"Invalid tenant id: {tenant_id}")
+    scope = f"{TENANT_FIELD}:=`{tenant_id}`"
+    return f"{scope} && ({validate_filter(filter_by)})" if filter_by else scope
+
+
+def tenant_document_id(tenant_id: str, doc_id: str) -> str:
+    """Return the id a tenant's document is stored under in a pooled collection.
+
+    Ids are only unique per tenant, so the stored id carries the tenant and
+    one tenant can never address, overwrite or take over another's document.
+    """
+    return f"{tenant_id}:{doc_id}"
+
+
+def strip_tenant(tenant_id: str, stored_id: str) -> str:
+    """Return the id a tenant knows a stored document by."""
+    prefix = f"{tenant_id}:"
+    return stored_id[len(prefix) :] if stored_id.startswith(prefix) else stored_id
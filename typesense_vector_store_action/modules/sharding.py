@@ -0,0 +1,306 @@
+"""Module for spreading a Typesense vector store across sharded collections."""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import heapq
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .langchain_typesense import Typesense
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to shard names.
+
+    Each shard is placed on the ring at several virtual points so that keys
+    spread evenly, and adding or removing a shard only moves the keys that
+    fall between its points and their neighbours.
+    """
+
+    def __init__(self, shards: List[str], replicas: int = 64) -> None:
+        """Build the ring for the given shard names."""
+        if not shards:
+            raise ValueError("HashRing requires at least one shard")
+        self._shards = list(shards)
+        self._ring = sorted(
+            (self._hash(f"{shard}#{replica}"), shard)
+            for shard in self._shards
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        """Return a stable 64-bit hash of the key."""
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    @property
+    def shards(self) -> List[str]:
+        """Return the shard names on the ring."""
+        return self._shards
+
+    def get(self, key: str) -> str:
+        """Return the shard name responsible for the key."""
+        if len(self._shards) == 1:
+            return self._shards[0]
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+def shard_key_value(doc_id: str, metadata: Optional[Dict[str, Any]], key: str) -> str:
+    """Return the value a document is hashed on.
+
+    Args:
+        doc_id: The document id.
+        metadata: The document metadata.
+        key: ``"id"`` or a metadata key; documents missing the metadata key
+            fall back to their id.
+
+    Returns:
+        The string to place on the hash ring.
+    """
+    if key != "id" and metadata and metadata.get(key) is not None:
+        return str(metadata[key])
+    return doc_id
+
+
+def merge_groups(
+    hits: List[Tuple[Document, float]],
+    group_by: str,
+    group_limit: int,
+    k: int = 0,
+) -> List[Tuple[Document, float]]:
+    """Merge grouped hits from several shards into one grouped result.
+
+    Documents sharing a group value can live on several shards, so each shard
+    returns its own partial group. Groups are rebuilt across shards, cut to
+    ``group_limit`` hits and ranked by their closest hit. Hits missing the
+    metadata key form a group of their own.
+
+    Args:
+        hits: Hits of every shard as (document, distance).
+        group_by: Metadata key the hits were grouped on.
+        group_limit: Maximum number of hits per group.
+        k: Number of groups to return; 0 returns all.
+
+    Returns:
+        Hits of the closest ``k`` groups, group by group, closest first.
+    """
+    groups: Dict[Any, List[Tuple[Document, float]]] = {}
+    for index, hit in enumerate(sorted(hits, key=lambda hit: hit[1])):
+        value = hit[0].metadata.get(group_by)
+        key = ("value", str(value)) if value is not None else ("hit", index)
+        group = groups.setdefault(key, [])
+        if len(group) < group_limit:
+            group.append(hit)
+    # dicts keep insertion order, and a group is created by its closest hit
+    ranked = list(groups.values())
+    if k:
+        ranked = ranked[:k]
+    return [hit for group in ranked for hit in group]
+
+
+class ShardedTypesense(VectorStore):
+    """Typesense vector store spread across several collections.
+
+    Documents are routed to a shard by consistent hashing on their id or a
+    metadata key. Searches embed the query once, fan out to every shard
+    concurrently and merge the per-shard top-k by vector distance.
+
+    Example:
+        .. code-block:: python
+
+            shards = [
+                Typesense(client, embedding, typesense_collection_name=f"docs_shard_{i}")
+                for i in range(4)
+            ]
+            vectorstore = ShardedTypesense(shards, embedding, shard_key="source")
+    """
+
+    def __init__(
+        self,
+        shards: List[Typesense],
+        embedding: Embeddings,
+        *,
+        shard_key: str = "id",
+    ) -> None:
+        """Initialize with the per-shard Typesense stores."""
+        if not shards:
+            raise ValueError("ShardedTypesense requires at least one shard")
+        self._shards = {shard._typesense_collection_name: shard for shard in shards}
+        self._ring = HashRing(list(self._shards))
+        self._embedding = embedding
+        self._shard_key = shard_key
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """Return the embeddings instance."""
+        return self._embedding
+
+    @property
+    def shards(self) -> List[Typesense]:
+        """Return the per-shard stores."""
+        return list(self._shards.values())
+
+    def shard_for(
+        self, doc_id: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> Typesense:
+        """Return the shard a document belongs to."""
+        return self._shards[
+            self._ring.get(shard_key_value(doc_id, metadata, self._shard_key))
+        ]
+
+    def _fan_out(self, func: Any, items: List[Any]) -> List[Any]:
+        """Run func over items concurrently, one worker per item."""
+        if not items:
+            return []
+        if len(items) == 1:
+            return [func(items[0])]
+        with ThreadPoolExecutor(max_workers=len(items)) as executor:
+            return list(executor.map(func, items))
+
+    def _prep_documents(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]],
+        ids: Optional[List[str]],
+    ) -> List[Dict[str, Any]]:
+        """Create documents from already computed embeddings for routing."""
+        return self.shards[0]._prep_documents(texts, embeddings, metadatas, ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Embed texts once and upsert each document into its shard.
+
+        Args:
+            texts: Iterable of strings to add to the vectorstore.
+            metadatas: Optional list of metadatas associated with the texts.
+            ids: Optional list of ids to associate with the texts.
+
+        Returns:
+            List of ids from adding the texts into the vectorstore.
+        """
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        docs = self.shards[0]._prep_texts(texts, metadatas, ids)
+        self.upsert_documents(docs)
+        return ids
+
+    def upsert_documents(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """Route prepared documents to their shards and upsert them concurrently.
+
+        Args:
+            docs: Documents as produced by ``Typesense._prep_documents``.
+
+        Returns:
+            List of ids of the upserted documents.
+        """
+        routed: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in docs:
+            shard = self.shard_for(doc["id"], doc.get("metadata"))
+            routed.setdefault(shard._typesense_collection_name, []).append(doc)
+
+        self._fan_out(
+            lambda name: self._shards[name].upsert_documents(routed[name]),
+            list(routed),
+        )
+        return [self.shards[0]._public_id(doc["id"]) for doc in docs]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 0,
+        filter: Optional[str] = "",
+        kwargs: Optional[dict] = None,
+        group_by: Optional[str] = None,
+        group_limit: Optional[int] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Return documents most similar to query across all shards, with scores.
+
+        With grouping, each shard returns its closest groups and the groups
+        are merged across shards before the closest ``k`` are kept.
+
+        Args:
+            query: Text to look up documents similar to.
+            k: Number of Documents to return.
+            filter: typesense filter_by expression to filter documents on.
+            group_by: Metadata key to group hits on within each shard.
+            group_limit: Maximum number of hits per group.
+
+        Returns:
+            List of Documents most similar to the query and score for each.
+        """
+        embedding = self._embedding.embed_query(query)
+        results = self._fan_out(
+            lambda shard: shard.similarity_search_by_vector_with_score(
+                embedding,
+                k=k,
+                filter=filter,
+                kwargs=kwargs,
+                group_by=group_by,
+                group_limit=group_limit,
+            ),
+            self.shards,
+        )
+        merged = [hit for hits in results for hit in hits]
+        group_by = self.shards[0]._group_by if group_by is None else group_by
+        if group_by:
+            group_limit = group_limit or self.shards[0]._group_limit
+            return merge_groups(merged, group_by, group_limit, k)
+        if not k:
+            return sorted(merged, key=lambda hit: hit[1])
+        return heapq.nsmallest(k, merged, key=lambda hit: hit[1])
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 10,
+        filter: Optional[str] = "",
+        **kwargs: Any,
+    ) -> List[Document]:
+        """Return documents most similar to query across all shards.
+
+        Args:
+            query: Text to look up documents similar to.
+            k: Number of Documents to return. Defaults to 10.
+            filter: typesense filter_by expression to filter documents on.
+
+        Returns:
+            List of Documents most similar to the query.
+        """
+        docs_and_score = self.similarity_search_with_score(
+            query, k=k, filter=filter, **kwargs
+        )
+        return [doc for doc, _ in docs_and_score]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> ShardedTypesense:
+        """Construct the sharded store from shards and add raw texts.
+
+        Requires a ``shards`` keyword argument holding the per-shard stores.
+        """
+        shards = kwargs.pop("shards", None)
+        if not shards:
+            raise ValueError("Must specify the per-shard Typesense stores as shards.")
+        vectorstore = cls(shards, embedding, **kwargs)
+        vectorstore.add_texts(texts, metadatas=metadatas)
+        return vectorstore